@@ -14,13 +14,22 @@ Observação: índices de faixa são baseados em uma serialização canônica in
 (json.dumps com separators=(",", ":"), ensure_ascii=False, sort_keys=False).
 Os endpoints que servem slices usam essa mesma string canônica, garantindo
 consistência entre mapa e recuperação.
+
+O carregamento é feito em streaming (EXTAPI_STREAM_LOAD=1, padrão): o arquivo é
+lido em blocos e cada elemento alimenta índices e blob canônico, sem manter o
+texto bruto em memória. O blob gerado é idêntico ao do caminho legado.
 """
 
 from __future__ import annotations
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, TextIO, Tuple
 
+import io
 import json
+import os
+import re
+import threading
 from pathlib import Path
 
 
@@ -28,6 +37,36 @@ from pathlib import Path
 # Estruturas de dados leves
 # -------------------------
 
+# valores de enum recebidos como string ("12", "-1")
+_INT_RE = re.compile(r"\s*[+-]?\d+\s*")
+
+# campos conhecidos de uma classe bruta (nem toda classe traz todos)
+_CLASS_FIELDS = (
+    "name", "is_refcounted", "is_instantiable", "inherits", "api_type",
+    "enums", "constants", "methods", "properties", "signals",
+)
+
+
+class UnknownFieldsError(ValueError):
+    """Projeção com campos inexistentes; valid lista os aceitos."""
+
+    def __init__(self, unknown: Iterable[str], valid: Iterable[str]):
+        self.unknown = sorted(unknown)
+        self.valid = sorted(valid)
+        super().__init__(
+            f"campos desconhecidos: {', '.join(self.unknown)}; válidos: {', '.join(self.valid)}"
+        )
+
+
+@dataclass
+class EnumMaps:
+    name: str                                   # chave pública: "Corner" ou "Control.Layout"
+    is_bitfield: bool
+    by_name: Dict[str, int]                     # "CORNER_TOP_LEFT" -> 0
+    by_value: Dict[int, List[str]]              # 0 -> ["CORNER_TOP_LEFT"] (aliases na ordem do JSON)
+    view: Dict[str, Any]                        # resposta pronta de get_global_enum/get_class_enum
+
+
 @dataclass
 class Indexes:
     version: str
@@ -43,15 +82,500 @@ class Indexes:
     utility_by_cat: Dict[str, List[str]]                           # "Math" -> ["sin", "cos", ...]
     native_structs_by_name: Dict[str, Dict[str, Any]]              # "PlaceHolder" -> {...}
     builtin_classes_by_name: Dict[str, Dict[str, Any]]             # "Color" -> {...}
+    global_enum_maps: Dict[str, EnumMaps]                          # "Corner" -> EnumMaps
+    class_enum_maps: Dict[str, EnumMaps]                           # "Control.Layout" -> EnumMaps
+    property_accessors: Dict[str, Dict[str, Dict[str, Any]]]       # classe -> propriedade -> {getter, setter, index, ...}
+
+
+# ---------------------------------------
+# Memo com single-flight (cálculos caros)
+# ---------------------------------------
+
+class _Flight:
+    __slots__ = ("event", "value", "exc")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value: Any = None
+        self.exc: Optional[BaseException] = None
+
+
+class SingleFlightMemo:
+    """
+    Memo LRU limitado + single-flight: chamadas concorrentes com a mesma chave
+    compartilham um único cálculo; as demais esperam o resultado do líder.
+    As chaves devem incluir a geração do documento para não misturar recargas.
+    Entradas fixadas (pin=True) ficam fora do LRU e só saem no clear().
+    clear() avança a época: cálculos em andamento nessa hora não gravam.
+    """
+
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = max(1, int(maxsize))
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._pinned: Dict[Hashable, Any] = {}
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            if key in self._pinned:
+                self.hits += 1
+                return self._pinned[key]
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+        return None
+
+    @property
+    def epoch(self) -> int:
+        return self._epoch
+
+    def put(self, key: Hashable, value: Any, pin: bool = False, epoch: Optional[int] = None) -> None:
+        """Com epoch, descarta o valor se houve clear() desde que ela foi lida."""
+        with self._lock:
+            if epoch is not None and epoch != self._epoch:
+                return
+            if pin:
+                self._data.pop(key, None)
+                self._pinned[key] = value
+                return
+            if key in self._pinned:
+                self._pinned[key] = value
+                return
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def find(self, pred: Callable[[Hashable], bool]) -> Optional[Tuple[Hashable, Any]]:
+        """Primeira entrada (mais recente primeiro) cuja chave satisfaz pred."""
+        with self._lock:
+            for k in self._pinned:
+                if pred(k):
+                    return k, self._pinned[k]
+            for k in reversed(self._data):
+                if pred(k):
+                    return k, self._data[k]
+        return None
+
+    def ensure_capacity(self, n: int) -> None:
+        """Aumenta o limite do LRU para caber n entradas (nunca diminui)."""
+        with self._lock:
+            self.maxsize = max(self.maxsize, int(n))
+
+    def get_or_compute(
+        self, key: Hashable, fn: Callable[[], Any], pin: bool = False, epoch: Optional[int] = None
+    ) -> Any:
+        """epoch: época a que o cálculo pertence (padrão: a atual ao registrar o voo)."""
+        with self._lock:
+            if key in self._pinned:
+                self.hits += 1
+                return self._pinned[key]
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            existing = self._inflight.get(key)
+            if existing is None:
+                fl = _Flight()
+                self._inflight[key] = fl
+                if epoch is None:
+                    epoch = self._epoch
+                self.misses += 1
+            else:
+                fl = existing
+                self.coalesced += 1
+        if existing is not None:
+            fl.event.wait()
+            if fl.exc is not None:
+                raise fl.exc
+            return fl.value
+        try:
+            fl.value = fn()
+            # quem já esperava recebe o valor mesmo se um clear() o tornou velho
+            self.put(key, fl.value, pin=pin, epoch=epoch)
+            return fl.value
+        except BaseException as exc:
+            fl.exc = exc
+            raise
+        finally:
+            with self._lock:
+                # após clear() a chave pode já pertencer a outro líder
+                if self._inflight.get(key) is fl:
+                    del self._inflight[key]
+            fl.event.set()
+
+    def clear(self, epoch: Optional[int] = None) -> None:
+        """Esvazia o memo; epoch fixa a nova época (ex.: a geração do documento)."""
+        with self._lock:
+            self._epoch = self._epoch + 1 if epoch is None else int(epoch)
+            self._data.clear()
+            self._pinned.clear()
+            # novas chamadas não se juntam a cálculos da época anterior
+            self._inflight = {}
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "pinned": len(self._pinned),
+                "maxsize": self.maxsize,
+                "inflight": len(self._inflight),
+                "epoch": self._epoch,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+            }
+
+
+class ExtApiState:
+    """
+    ExtApi residente com recarga por mtime (compartilhado por HTTP e daemon).
+    Uma recarga por vez; geração e ExtApi trocados juntos em snapshot.
+    """
+
+    def __init__(self, p: Path):
+        self.p = p
+        self._mtime = 0.0
+        self._ext: Optional["ExtApi"] = None
+        # (geração, ext) trocados juntos para leituras consistentes entre recargas
+        self._snap: Tuple[int, Optional["ExtApi"]] = (0, None)
+        # loads concorrentes multiplicariam o pico de memória
+        self._reload_lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if not self.p.exists():
+            raise FileNotFoundError(f"extension_api.json não encontrado em {self.p}")
+        # mtime lido antes do load: uma troca durante o load ainda dispara nova recarga
+        m = self.p.stat().st_mtime
+        self._ext = ExtApi(self.p)
+        self._mtime = m
+        gen = self._snap[0] + 1
+        self._snap = (gen, self._ext)
+        self._after_load(gen, self._ext)
+
+    def _after_load(self, gen: int, ext: "ExtApi") -> None:
+        """Gancho para subclasses, chamado ainda sob o lock de recarga."""
+
+    def _on_reloaded(self, gen: int, ext: "ExtApi") -> None:
+        """Gancho para subclasses, chamado fora do lock e só na thread que recarregou."""
+
+    def maybe_reload(self) -> bool:
+        """Recarrega se o arquivo mudou; True só na thread que recarregou."""
+        m = self.p.stat().st_mtime
+        if m <= self._mtime:
+            return False
+        with self._reload_lock:
+            if m <= self._mtime:
+                return False  # outra thread já recarregou
+            self._load()
+            snap = self.snapshot
+        self._on_reloaded(*snap)
+        return True
+
+    @property
+    def ext(self) -> "ExtApi":
+        return self._ext  # type: ignore
+
+    @property
+    def snapshot(self) -> Tuple[int, "ExtApi"]:
+        return self._snap  # type: ignore
+
+    @property
+    def generation(self) -> int:
+        return self._snap[0]
+
+    @property
+    def mtime(self) -> float:
+        return self._mtime
+
+
+# ------------------------------------------------
+# Construção incremental dos índices (item a item)
+# ------------------------------------------------
+
+class _IndexBuilder:
+    """
+    Recebe cada valor de topo e cada elemento das seções-array na ordem do
+    documento; permite montar os índices durante a leitura em streaming sem
+    depender do dict completo.
+    """
+
+    def __init__(self):
+        self.header: Dict[str, Any] = {}
+        self.version_obj: Dict[str, Any] = {}
+        self.classes_by_name: Dict[str, Dict[str, Any]] = {}
+        self.methods_by_name: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {}
+        self.methods_by_hash: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {}
+        self.class_enums_qualname: Dict[str, Dict[str, Any]] = {}
+        self.global_enums_by_name: Dict[str, Dict[str, Any]] = {}
+        self.singletons_by_name: Dict[str, str] = {}
+        self.utility_by_name: Dict[str, Dict[str, Any]] = {}
+        self.utility_by_cat: Dict[str, List[str]] = {}
+        self.builtin_sizes: Dict[str, Dict[str, int]] = {}
+        self.builtin_offsets: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
+        self.native_structs_by_name: Dict[str, Dict[str, Any]] = {}
+        self.builtin_classes_by_name: Dict[str, Dict[str, Any]] = {}
+        self._item_handlers: Dict[str, Callable[[Dict[str, Any]], None]] = {
+            "classes": self._add_class,
+            "global_enums": self._add_global_enum,
+            "singletons": self._add_singleton,
+            "utility_functions": self._add_utility,
+            "builtin_class_sizes": self._add_builtin_sizes,
+            "builtin_class_member_offsets": self._add_builtin_offsets,
+            "native_structures": self._add_native_struct,
+            "builtin_classes": self._add_builtin_class,
+        }
+
+    def add_value(self, key: str, value: Any) -> None:
+        if key == "header":
+            self.header = value or {}
+        elif key == "version":
+            self.version_obj = value or {}
+
+    def add_item(self, key: str, item: Any) -> None:
+        h = self._item_handlers.get(key)
+        if h is not None:
+            h(item)
+
+    # Classes (com métodos/props/sinais/enums dentro)
+    def _add_class(self, c: Dict[str, Any]) -> None:
+        name = c.get("name")
+        if not name:
+            return
+        self.classes_by_name[name] = c
+        # Métodos
+        for m in (c.get("methods", []) or []):
+            mn = m.get("name")
+            if not mn:
+                continue
+            self.methods_by_name.setdefault(mn, []).append((name, m))
+            # hash principal
+            hv_main = m.get("hash")
+            if hv_main is not None:
+                self.methods_by_hash.setdefault(str(hv_main), []).append((name, m))
+            # hash_compatibility pode ser lista
+            hv_compat = m.get("hash_compatibility")
+            if isinstance(hv_compat, list):
+                for hcv in hv_compat:
+                    self.methods_by_hash.setdefault(str(hcv), []).append((name, m))
+            elif hv_compat is not None:
+                self.methods_by_hash.setdefault(str(hv_compat), []).append((name, m))
+        # Enums da classe (qualificados: Classe.Enum)
+        for e in (c.get("enums", []) or []):
+            en = e.get("name")
+            if en:
+                self.class_enums_qualname[f"{name}.{en}"] = e
+
+    def _add_global_enum(self, e: Dict[str, Any]) -> None:
+        en = e.get("name")
+        if en:
+            self.global_enums_by_name[en] = e
+
+    def _add_singleton(self, s: Dict[str, Any]) -> None:
+        nm = s.get("name")
+        tp = s.get("type")
+        if nm and tp:
+            self.singletons_by_name[nm] = tp
+
+    def _add_utility(self, u: Dict[str, Any]) -> None:
+        nm = u.get("name")
+        if nm:
+            self.utility_by_name[nm] = u
+            cat = u.get("category") or ""
+            self.utility_by_cat.setdefault(cat, []).append(nm)
+
+    # Builtins: tamanhos e offsets por configuração
+    def _add_builtin_sizes(self, conf: Dict[str, Any]) -> None:
+        conf_name = conf.get("build_configuration")
+        sizes_map: Dict[str, int] = {}
+        for item in (conf.get("sizes", []) or []):
+            bname = item.get("name")
+            size = item.get("size")
+            if bname is not None and size is not None:
+                sizes_map[bname] = size
+        if conf_name:
+            self.builtin_sizes[conf_name] = sizes_map
+
+    def _add_builtin_offsets(self, conf: Dict[str, Any]) -> None:
+        conf_name = conf.get("build_configuration")
+        cmap: Dict[str, List[Dict[str, Any]]] = {}
+        for c in (conf.get("classes", []) or []):
+            bname = c.get("name")
+            members = c.get("members", []) or []
+            if bname:
+                cmap[bname] = members
+        if conf_name:
+            self.builtin_offsets[conf_name] = cmap
+
+    def _add_native_struct(self, n: Dict[str, Any]) -> None:
+        nn = n.get("name")
+        if nn:
+            self.native_structs_by_name[nn] = n
+
+    def _add_builtin_class(self, b: Dict[str, Any]) -> None:
+        bn = b.get("name")
+        if bn:
+            self.builtin_classes_by_name[bn] = b
+
+    def finish(self) -> Indexes:
+        version = (
+            self.header.get("version_full_name")
+            or self.version_obj.get("string")
+            or self.version_obj.get("full_name")
+            or "unknown"
+        )
+
+        # Propriedades: getter/setter resolvidos (podem estar em ancestrais)
+        property_accessors = ExtApi._build_property_accessors(self.classes_by_name)
+
+        # Enums: mapas nome->valor e valor->nomes
+        global_enum_maps = {k: ExtApi._enum_maps(k, e) for k, e in self.global_enums_by_name.items()}
+        class_enum_maps = {k: ExtApi._enum_maps(k, e) for k, e in self.class_enums_qualname.items()}
+
+        return Indexes(
+            version=version,
+            classes_by_name=self.classes_by_name,
+            methods_by_name=self.methods_by_name,
+            methods_by_hash=self.methods_by_hash,
+            global_enums_by_name=self.global_enums_by_name,
+            class_enums_qualname=self.class_enums_qualname,
+            singletons_by_name=self.singletons_by_name,
+            builtin_sizes=self.builtin_sizes,
+            builtin_offsets=self.builtin_offsets,
+            utility_by_name=self.utility_by_name,
+            utility_by_cat=self.utility_by_cat,
+            native_structs_by_name=self.native_structs_by_name,
+            builtin_classes_by_name=self.builtin_classes_by_name,
+            global_enum_maps=global_enum_maps,
+            class_enum_maps=class_enum_maps,
+            property_accessors=property_accessors,
+        )
+
+
+# ------------------------------------------------------
+# Leitura incremental do JSON (sem materializar o texto)
+# ------------------------------------------------------
+
+_WS = re.compile(r"[ \t\n\r]*")
+_DELIMS = frozenset(",:]} \t\n\r")
+
+
+class _StreamReader:
+    """
+    Lê o documento em blocos e decodifica um valor por vez com raw_decode.
+    O buffer guarda só o bloco atual mais o elemento ainda incompleto.
+    """
+
+    def __init__(self, f: TextIO, chunk_size: int):
+        self.f = f
+        self.chunk_size = max(4096, int(chunk_size))
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self._dec = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            self.pos = _WS.match(self.buf, self.pos).end()  # type: ignore[union-attr]
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, ch: str) -> None:
+        got = self.peek()
+        if got != ch:
+            raise ValueError(f"JSON inválido: esperado {ch!r}, encontrado {got!r} (offset local {self.pos})")
+        self.pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                v, end = self._dec.raw_decode(self.buf, self.pos)
+                # um número no fim do buffer pode estar truncado ("12" de "12.5e3");
+                # só aceita se seguido de delimitador ou no EOF
+                if self.eof or (end < len(self.buf) and self.buf[end] in _DELIMS):
+                    self.pos = end
+                    return v
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill()
+
+    def events(self) -> Iterator[Tuple[str, str, Any]]:
+        """
+        Eventos do objeto de topo: ("value", chave, valor) para valores comuns;
+        ("begin", chave, None), ("item", chave, elemento)..., ("end", chave, None)
+        para arrays, que são entregues elemento a elemento.
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            if not isinstance(key, str):
+                raise ValueError("JSON inválido: chave de topo não é string")
+            self.expect(":")
+            if self.peek() == "[":
+                self.pos += 1
+                yield ("begin", key, None)
+                if self.peek() == "]":
+                    self.pos += 1
+                else:
+                    while True:
+                        yield ("item", key, self.value())
+                        ch = self.peek()
+                        self.pos += 1
+                        if ch == "]":
+                            break
+                        if ch != ",":
+                            raise ValueError(f"JSON inválido em {key!r}: esperado ',' ou ']', encontrado {ch!r}")
+                yield ("end", key, None)
+            else:
+                yield ("value", key, self.value())
+            ch = self.peek()
+            self.pos += 1
+            if ch == "}":
+                return
+            if ch != ",":
+                raise ValueError(f"JSON inválido: esperado ',' ou '}}', encontrado {ch!r}")
+
+
+# Leitura em streaming por padrão; EXTAPI_STREAM_LOAD=0 volta ao caminho texto -> loads -> dumps
+STREAM_LOAD = os.getenv("EXTAPI_STREAM_LOAD", "1") == "1"
+STREAM_CHUNK = int(os.getenv("EXTAPI_STREAM_CHUNK", str(1 << 20)))
 
 
 class ExtApi:
-    def __init__(self, json_path: str | Path):
+    def __init__(self, json_path: str | Path, stream: Optional[bool] = None):
         self.path = Path(json_path)
-        self.api_raw_text: str = self._load_text(self.path)              # Texto original (não usado para ranges)
-        self.api: Dict[str, Any] = self._load_api_from_text(self.api_raw_text)
-        self.canon: str = self._to_canonical(self.api)                   # String base para ranges
-        self.ix = self._build_indexes(self.api)
+        if STREAM_LOAD if stream is None else stream:
+            # Sem texto bruto em memória: cada elemento vai direto para índices e blob canônico
+            self.api_raw_text: Optional[str] = None
+            self.api, self.canon, self.ix = self._load_streaming(self.path)
+        else:
+            self.api_raw_text = self._load_text(self.path)               # Texto original (não usado para ranges)
+            self.api: Dict[str, Any] = self._load_api_from_text(self.api_raw_text)
+            self.canon: str = self._to_canonical(self.api)               # String base para ranges
+            self.ix = self._build_indexes(self.api)
 
     # ------------
     # Carregamento
@@ -65,6 +589,53 @@ class ExtApi:
     def _load_api_from_text(text: str) -> Dict[str, Any]:
         return json.loads(text)
 
+    @staticmethod
+    def _load_streaming(path: Path, chunk_size: int = STREAM_CHUNK) -> Tuple[Dict[str, Any], str, Indexes]:
+        """
+        Lê o JSON em blocos; cada valor de topo e cada elemento de array é
+        decodificado uma vez e alimenta o dict, o builder de índices e o writer
+        canônico. O blob resultante é idêntico ao de _to_canonical(api).
+        """
+        api: Dict[str, Any] = {}
+        builder = _IndexBuilder()
+        # escrita direta no StringIO: sem lista de fragmentos + join (segunda cópia no pico)
+        out = io.StringIO()
+        write = out.write
+        write("{")
+        first_key = True
+        first_item = True
+        dump = ExtApi._to_canonical
+        with path.open("r", encoding="utf-8") as f:
+            for kind, key, val in _StreamReader(f, chunk_size).events():
+                if kind == "item":
+                    api[key].append(val)
+                    builder.add_item(key, val)
+                    if not first_item:
+                        write(",")
+                    write(dump(val))
+                    first_item = False
+                    continue
+                if kind == "end":
+                    write("]")
+                    continue
+                if not first_key:
+                    write(",")
+                first_key = False
+                write(dump(key))
+                write(":")
+                if kind == "begin":
+                    api[key] = []
+                    write("[")
+                    first_item = True
+                else:
+                    api[key] = val
+                    builder.add_value(key, val)
+                    write(dump(val))
+        write("}")
+        canon = out.getvalue()
+        out.close()
+        return api, canon, builder.finish()
+
     @staticmethod
     def _to_canonical(obj: Any) -> str:
         # json canônico, usado como "blob" para cálculo de posições
@@ -75,127 +646,81 @@ class ExtApi:
     # -----------------------
     @staticmethod
     def _build_indexes(api: Dict[str, Any]) -> Indexes:
-        header = api.get("header") or {}
-        version = (
-            header.get("version_full_name")
-            or (api.get("version") or {}).get("string")
-            or (api.get("version") or {}).get("full_name")
-            or "unknown"
+        b = _IndexBuilder()
+        for key, value in api.items():
+            if isinstance(value, list):
+                for item in value:
+                    b.add_item(key, item)
+            else:
+                b.add_value(key, value)
+        return b.finish()
+
+    @staticmethod
+    def _build_property_accessors(classes_by_name: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        own_methods: Dict[str, Dict[str, Dict[str, Any]]] = {
+            cname: {m.get("name"): m for m in (c.get("methods", []) or []) if m.get("name")}
+            for cname, c in classes_by_name.items()
+        }
+
+        unresolved_tpl = dict(
+            {k: None for k in ExtApi._sig_dict("", {})},
+            resolved=False,
         )
 
-        # Classes (com métodos/props/sinais/enums dentro)
-        classes_by_name: Dict[str, Dict[str, Any]] = {}
-        methods_by_name: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {}
-        methods_by_hash: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {}
-        class_enums_qualname: Dict[str, Dict[str, Any]] = {}
+        def _resolve(cname: str, mname: Optional[str]) -> Optional[Dict[str, Any]]:
+            if not mname:
+                return None
+            seen = set()
+            cur: Optional[str] = cname
+            while cur and cur not in seen:
+                seen.add(cur)
+                m = (own_methods.get(cur) or {}).get(mname)
+                if m is not None:
+                    return dict(ExtApi._sig_dict(cur, m), resolved=True)
+                cur = (classes_by_name.get(cur) or {}).get("inherits")
+            # mesmas chaves do registro resolvido, com nulos
+            return dict(unresolved_tpl, name=mname)
 
-        for c in (api.get("classes", []) or []):
-            name = c.get("name")
-            if not name:
-                continue
-            classes_by_name[name] = c
-            # Métodos
-            for m in (c.get("methods", []) or []):
-                mn = m.get("name")
-                if not mn:
+        out: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for cname, c in classes_by_name.items():
+            props: Dict[str, Dict[str, Any]] = {}
+            for p in (c.get("properties", []) or []):
+                pn = p.get("name")
+                if not pn:
                     continue
-                methods_by_name.setdefault(mn, []).append((name, m))
-                # hash principal
-                hv_main = m.get("hash")
-                if hv_main is not None:
-                    methods_by_hash.setdefault(str(hv_main), []).append((name, m))
-                # hash_compatibility pode ser lista
-                hv_compat = m.get("hash_compatibility")
-                if isinstance(hv_compat, list):
-                    for hcv in hv_compat:
-                        methods_by_hash.setdefault(str(hcv), []).append((name, m))
-                elif hv_compat is not None:
-                    methods_by_hash.setdefault(str(hv_compat), []).append((name, m))
-            # Enums da classe (qualificados: Classe.Enum)
-            for e in (c.get("enums", []) or []):
-                en = e.get("name")
-                if en:
-                    class_enums_qualname[f"{name}.{en}"] = e
-
-        # Enums globais
-        global_enums_by_name: Dict[str, Dict[str, Any]] = {}
-        for e in (api.get("global_enums", []) or []):
-            en = e.get("name")
-            if en:
-                global_enums_by_name[en] = e
-
-        # Singletons
-        singletons_by_name: Dict[str, str] = {}
-        for s in (api.get("singletons", []) or []):
-            nm = s.get("name")
-            tp = s.get("type")
-            if nm and tp:
-                singletons_by_name[nm] = tp
-
-        # Utility
-        utility_by_name: Dict[str, Dict[str, Any]] = {}
-        utility_by_cat: Dict[str, List[str]] = {}
-        for u in (api.get("utility_functions", []) or []):
-            nm = u.get("name")
-            if nm:
-                utility_by_name[nm] = u
-                cat = u.get("category") or ""
-                utility_by_cat.setdefault(cat, []).append(nm)
-
-        # Builtins: tamanhos e offsets por configuração
-        builtin_sizes: Dict[str, Dict[str, int]] = {}
-        for conf in (api.get("builtin_class_sizes", []) or []):
-            conf_name = conf.get("build_configuration")
-            sizes_map: Dict[str, int] = {}
-            for item in (conf.get("sizes", []) or []):
-                bname = item.get("name")
-                size = item.get("size")
-                if bname is not None and size is not None:
-                    sizes_map[bname] = size
-            if conf_name:
-                builtin_sizes[conf_name] = sizes_map
-
-        builtin_offsets: Dict[str, Dict[str, List[Dict[str, Any]]]] = {}
-        for conf in (api.get("builtin_class_member_offsets", []) or []):
-            conf_name = conf.get("build_configuration")
-            cmap: Dict[str, List[Dict[str, Any]]] = {}
-            for c in (conf.get("classes", []) or []):
-                bname = c.get("name")
-                members = c.get("members", []) or []
-                if bname:
-                    cmap[bname] = members
-            if conf_name:
-                builtin_offsets[conf_name] = cmap
-
-        # Native structures
-        native_structs_by_name: Dict[str, Dict[str, Any]] = {}
-        for n in (api.get("native_structures", []) or []):
-            nn = n.get("name")
-            if nn:
-                native_structs_by_name[nn] = n
-
-        # Builtin classes (detalhes)
-        builtin_classes_by_name: Dict[str, Dict[str, Any]] = {}
-        for b in (api.get("builtin_classes", []) or []):
-            bn = b.get("name")
-            if bn:
-                builtin_classes_by_name[bn] = b
+                props[pn] = {
+                    "class": cname,
+                    "property": pn,
+                    "type": p.get("type"),
+                    "index": p.get("index"),
+                    "getter": _resolve(cname, p.get("getter")),
+                    "setter": _resolve(cname, p.get("setter")),
+                }
+            if props:
+                out[cname] = props
+        return out
 
-        return Indexes(
-            version=version,
-            classes_by_name=classes_by_name,
-            methods_by_name=methods_by_name,
-            methods_by_hash=methods_by_hash,
-            global_enums_by_name=global_enums_by_name,
-            class_enums_qualname=class_enums_qualname,
-            singletons_by_name=singletons_by_name,
-            builtin_sizes=builtin_sizes,
-            builtin_offsets=builtin_offsets,
-            utility_by_name=utility_by_name,
-            utility_by_cat=utility_by_cat,
-            native_structs_by_name=native_structs_by_name,
-            builtin_classes_by_name=builtin_classes_by_name,
-        )
+    @staticmethod
+    def _enum_maps(key: str, e: Dict[str, Any]) -> EnumMaps:
+        by_name: Dict[str, int] = {}
+        by_value: Dict[int, List[str]] = {}
+        items: List[Dict[str, Any]] = []
+        for v in (e.get("values", []) or []):
+            vn = v.get("name")
+            vv = v.get("value")
+            if not vn or not isinstance(vv, int):
+                continue
+            by_name[vn] = vv
+            by_value.setdefault(vv, []).append(vn)
+            items.append({"name": vn, "value": vv})
+        is_bitfield = bool(e.get("is_bitfield"))
+        view = {
+            "name": key,
+            "is_bitfield": is_bitfield,
+            "values": [it["name"] for it in items],
+            "items": items,
+        }
+        return EnumMaps(name=key, is_bitfield=is_bitfield, by_name=by_name, by_value=by_value, view=view)
 
     # ------------------
     # Funções de consulta
@@ -212,7 +737,19 @@ class ExtApi:
             "blob_canonical_bytes": len(self.canon),
         }
 
-    def get_class(self, name: str) -> Optional[Dict[str, Any]]:
+    def get_class(
+        self,
+        name: str,
+        fields: Optional[str | Iterable[str]] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Optional[Dict[str, Any]]:
+        c = self._resolve_class(name)
+        if not c or (fields is None and not offset and limit is None):
+            return c
+        return self.project(c, list(c.keys()), {}, fields, offset, limit, valid=(*_CLASS_FIELDS, *c))
+
+    def _resolve_class(self, name: str) -> Optional[Dict[str, Any]]:
         c = self.ix.classes_by_name.get(name)
         if c:
             return c
@@ -221,29 +758,55 @@ class ExtApi:
                 return self.ix.classes_by_name[k]
         return None
 
-    def list_class_items(self, name: str) -> Optional[Dict[str, Any]]:
-        c = self.get_class(name)
+    def list_class_items(
+        self,
+        name: str,
+        fields: Optional[str | Iterable[str]] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Optional[Dict[str, Any]]:
+        c = self._resolve_class(name)
         if not c:
             return None
-        return {
-            "name": c.get("name"),
-            "api_type": c.get("api_type"),
-            "inherits": c.get("inherits"),
-            "is_instantiable": c.get("is_instantiable"),
-            "is_refcounted": c.get("is_refcounted"),
-            "methods": [self._fmt_method_sig(m, c.get("name")) for m in (c.get("methods", []) or [])],
-            "properties": [self._fmt_property(p) for p in (c.get("properties", []) or [])],
-            "signals": [self._fmt_signal(s) for s in (c.get("signals", []) or [])],
-            "constants": [
-                {"name": k.get("name"), "value": k.get("value")} for k in (c.get("constants", []) or [])
-            ],
-            "enums": [
-                {
-                    "name": e.get("name"),
-                    "values": [v.get("name") for v in (e.get("values", []) or [])],
-                } for e in (c.get("enums", []) or [])
-            ],
+        cname = c.get("name")
+        fmts: Dict[str, Callable[[Any], Any]] = {
+            "methods": lambda m: self._fmt_method_sig(m, cname),
+            "properties": self._fmt_property,
+            "signals": self._fmt_signal,
+            "constants": lambda k: {"name": k.get("name"), "value": k.get("value")},
+            "enums": lambda e: {
+                "name": e.get("name"),
+                "values": [v.get("name") for v in (e.get("values", []) or [])],
+            },
         }
+        keys = ["name", "api_type", "inherits", "is_instantiable", "is_refcounted", *fmts]
+        src = {k: (c.get(k, []) or []) if k in fmts else c.get(k) for k in keys}
+        return self.project(src, keys, fmts, fields, offset, limit)
+
+    def get_property_accessors(self, cls: str, prop: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Getter/setter resolvidos das propriedades de uma classe. Com prop, procura
+        também nos ancestrais e devolve só aquele registro.
+        """
+        c = self._resolve_class(cls)
+        if not c:
+            return None
+        cname = c.get("name")
+        if prop is None:
+            return {"class": cname, "properties": self.ix.property_accessors.get(cname, {})}
+        seen = set()
+        cur: Optional[str] = cname
+        while cur and cur not in seen:
+            seen.add(cur)
+            rec = (self.ix.property_accessors.get(cur) or {}).get(prop)
+            if rec is not None:
+                return rec
+            cur = (self.ix.classes_by_name.get(cur) or {}).get("inherits")
+        return None
+
+    def export_property_accessors(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Índice completo classe -> propriedade -> acessores, já resolvido no load."""
+        return self.ix.property_accessors
 
     def find_methods(self, name: str, cls: Optional[str] = None) -> List[Dict[str, Any]]:
         out: List[Dict[str, Any]] = []
@@ -258,18 +821,26 @@ class ExtApi:
         return [self._sig_dict(cname, m) for cname, m in (self.ix.methods_by_hash.get(hs, []) or [])]
 
     def get_global_enum(self, name: str) -> Optional[Dict[str, Any]]:
-        e = self.ix.global_enums_by_name.get(name)
-        if e:
-            return {"name": name, "values": [v.get("name") for v in (e.get("values", []) or [])]}
-        for k, e in self.ix.global_enums_by_name.items():
+        em = self._resolve_global_enum(name)
+        return em.view if em else None
+
+    def get_class_enum(self, qualified: str) -> Optional[Dict[str, Any]]:
+        em = self._resolve_class_enum(qualified)
+        return em.view if em else None
+
+    def _resolve_global_enum(self, name: str) -> Optional[EnumMaps]:
+        em = self.ix.global_enum_maps.get(name)
+        if em:
+            return em
+        for k, em in self.ix.global_enum_maps.items():
             if k.lower() == name.lower():
-                return {"name": k, "values": [v.get("name") for v in (e.get("values", []) or [])]}
+                return em
         return None
 
-    def get_class_enum(self, qualified: str) -> Optional[Dict[str, Any]]:
-        e = self.ix.class_enums_qualname.get(qualified)
-        if e:
-            return {"name": qualified, "values": [v.get("name") for v in (e.get("values", []) or [])]}
+    def _resolve_class_enum(self, qualified: str) -> Optional[EnumMaps]:
+        em = self.ix.class_enum_maps.get(qualified)
+        if em:
+            return em
         parts = qualified.split(".")
         if len(parts) == 2:
             cpart, enpart = parts
@@ -279,12 +850,86 @@ class ExtApi:
                     cname_real = k
                     break
             if cname_real:
-                key = f"{cname_real}.{enpart}"
-                e = self.ix.class_enums_qualname.get(key)
-                if e:
-                    return {"name": key, "values": [v.get("name") for v in (e.get("values", []) or [])]}
+                return self.ix.class_enum_maps.get(f"{cname_real}.{enpart}")
         return None
 
+    def _resolve_enum(self, name: str) -> Optional[EnumMaps]:
+        # aceita também os tipos como aparecem no JSON: "enum::Corner", "bitfield::Control.SizeFlags"
+        for prefix in ("enum::", "bitfield::"):
+            if name.startswith(prefix):
+                name = name[len(prefix):]
+                break
+        # enums globais podem ter ponto no nome ("Variant.Type"), por isso vêm primeiro
+        return self._resolve_global_enum(name) or self._resolve_class_enum(name)
+
+    # ------------------------------
+    # Enums: decodificação em lote
+    # ------------------------------
+    def decode_enum_value(self, enum: str, value: int | str) -> Dict[str, Any]:
+        """
+        Resolve um valor numérico para nome(s). Em bitfields sem valor exato,
+        decompõe em flags de um bit; bits sem nome ficam em "unknown_bits".
+        """
+        em = self._resolve_enum(enum)
+        if not em:
+            return {"enum": enum, "value": value, "error": "enum não encontrado"}
+        # int(1.9) truncaria e bool é subclasse de int; ambos são rejeitados
+        if isinstance(value, bool):
+            return {"enum": em.name, "value": value, "error": "valor deve ser inteiro"}
+        if isinstance(value, int):
+            v = value
+        elif isinstance(value, str) and _INT_RE.fullmatch(value):
+            v = int(value)
+        else:
+            return {"enum": em.name, "value": value, "error": "valor deve ser inteiro"}
+        out: Dict[str, Any] = {"enum": em.name, "value": v, "is_bitfield": em.is_bitfield}
+        exact = em.by_value.get(v)
+        if exact or not em.is_bitfield:
+            out["names"] = list(exact or [])
+            return out
+        names: List[str] = []
+        rem = v
+        for fv, fnames in sorted(em.by_value.items()):
+            # só flags de um bit, evita escolher máscaras compostas (ex.: SIZE_EXPAND_FILL)
+            if fv > 0 and (fv & (fv - 1)) == 0 and (v & fv):
+                names.append(fnames[0])
+                rem &= ~fv
+        out["names"] = names
+        out["unknown_bits"] = rem
+        return out
+
+    def encode_enum_value(self, enum: str, names: str | List[str]) -> Dict[str, Any]:
+        """
+        Converte nome(s) em valor. Aceita lista ou string "A|B"; mais de um nome
+        só é permitido em bitfields (combinados por OR).
+        """
+        em = self._resolve_enum(enum)
+        if not em:
+            return {"enum": enum, "names": names, "error": "enum não encontrado"}
+        if isinstance(names, str):
+            nl = [n.strip() for n in names.split("|") if n.strip()]
+        else:
+            nl = [str(n) for n in (names or [])]
+        if not nl:
+            return {"enum": em.name, "names": nl, "error": "nenhum nome informado"}
+        if len(nl) > 1 and not em.is_bitfield:
+            return {"enum": em.name, "names": nl, "error": "múltiplos nomes só em bitfield"}
+        unknown = [n for n in nl if n not in em.by_name]
+        if unknown:
+            return {"enum": em.name, "names": nl, "error": "nomes desconhecidos", "unknown": unknown}
+        v = 0
+        for n in nl:
+            v |= em.by_name[n]
+        return {"enum": em.name, "names": nl, "value": v, "is_bitfield": em.is_bitfield}
+
+    def decode_enum_values(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Lote de {"enum", "value"} -> resultados na mesma ordem."""
+        return [self.decode_enum_value(it.get("enum") or "", it.get("value")) for it in items]
+
+    def encode_enum_values(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Lote de {"enum", "names"} -> resultados na mesma ordem."""
+        return [self.encode_enum_value(it.get("enum") or "", it.get("names") or []) for it in items]
+
     def list_singletons(self) -> Dict[str, str]:
         return dict(self.ix.singletons_by_name)
 
@@ -311,49 +956,52 @@ class ExtApi:
     def list_builtin_names(self) -> List[str]:
         return sorted(list(self.ix.builtin_classes_by_name.keys()))
 
-    def get_builtin(self, name: str) -> Optional[Dict[str, Any]]:
+    def get_builtin(
+        self,
+        name: str,
+        fields: Optional[str | Iterable[str]] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Optional[Dict[str, Any]]:
         b = self._resolve_builtin_name(name)
         if not b:
             return None
-        out: Dict[str, Any] = {
+        fmts: Dict[str, Callable[[Any], Any]] = {
+            "members": lambda m: {
+                "name": m.get("name"),
+                "type": (m.get("type") if not isinstance(m.get("type"), dict) else m.get("type", {}).get("type")),
+            },
+            "constants": lambda c: {"name": c.get("name"), "value": c.get("value")},
+            "constructors": lambda c: {
+                "index": c.get("index"),
+                "args": [a.get("type") for a in (c.get("arguments", []) or [])]
+            },
+            "operators": lambda op: {
+                "name": op.get("name"),
+                "right_type": op.get("right_type"),
+                "return_type": op.get("return_type"),
+            },
+            "methods": lambda m: {
+                "name": m.get("name"),
+                "return_type": m.get("return_type"),
+                "is_vararg": m.get("is_vararg", False),
+                "args": [a.get("type") for a in (m.get("arguments", []) or [])]
+            },
+        }
+        src: Dict[str, Any] = {
             "name": b.get("name"),
             "is_keyed": b.get("is_keyed"),
             "has_destructor": b.get("has_destructor"),
         }
         if "indexing_return_type" in b:
-            out["indexing_return_type"] = b.get("indexing_return_type")
-        if b.get("members"):
-            out["members"] = [
-                {"name": m.get("name"), "type": (m.get("type") if not isinstance(m.get("type"), dict) else m.get("type", {}).get("type"))}
-                for m in b.get("members", []) if isinstance(m, dict)
-            ]
-        if b.get("constants"):
-            out["constants"] = [{"name": c.get("name"), "value": c.get("value")} for c in b.get("constants", [])]
-        if b.get("constructors"):
-            out["constructors"] = [
-                {
-                    "index": c.get("index"),
-                    "args": [a.get("type") for a in (c.get("arguments", []) or [])]
-                } for c in b.get("constructors", [])
-            ]
-        if b.get("operators"):
-            out["operators"] = [
-                {
-                    "name": op.get("name"),
-                    "right_type": op.get("right_type"),
-                    "return_type": op.get("return_type"),
-                } for op in b.get("operators", [])
-            ]
-        if b.get("methods"):
-            out["methods"] = [
-                {
-                    "name": m.get("name"),
-                    "return_type": m.get("return_type"),
-                    "is_vararg": m.get("is_vararg", False),
-                    "args": [a.get("type") for a in (m.get("arguments", []) or [])]
-                } for m in b.get("methods", [])
-            ]
-        return out
+            src["indexing_return_type"] = b.get("indexing_return_type")
+        for k in fmts:
+            if b.get(k):
+                src[k] = b.get(k)
+        if "members" in src:
+            src["members"] = [m for m in src["members"] if isinstance(m, dict)]
+        valid = ("name", "is_keyed", "has_destructor", "indexing_return_type", *fmts)
+        return self.project(src, list(src.keys()), fmts, fields, offset, limit, valid=valid)
 
     def get_builtin_layout(self, name: str, config: str = "float_32") -> Optional[Dict[str, Any]]:
         bn = self._resolve_builtin_key(name)
@@ -399,16 +1047,83 @@ class ExtApi:
         except Exception:
             return []
 
-    def get_native_struct(self, name: str) -> Optional[Dict[str, Any]]:
-        """Return a native struct dict by name, case-insensitive."""
+    def get_native_struct(
+        self,
+        name: str,
+        fields: Optional[str | Iterable[str]] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Return a native struct dict by name, case-insensitive, optionally projected."""
         d = self.ix.native_structs_by_name.get(name)
-        if d:
+        if not d:
+            lname = name.lower()
+            for k, v in self.ix.native_structs_by_name.items():
+                if k.lower() == lname:
+                    d = v
+                    break
+        if not d or (fields is None and not offset and limit is None):
             return d
-        lname = name.lower()
-        for k, v in self.ix.native_structs_by_name.items():
-            if k.lower() == lname:
-                return v
-        return None
+        return self.project(d, list(d.keys()), {}, fields, offset, limit, valid=("name", "format", *d))
+
+    # ----------------------
+    # Projeção e paginação
+    # ----------------------
+    @staticmethod
+    def normalize_fields(fields: Optional[str | Iterable[str]]) -> Optional[Tuple[str, ...]]:
+        """
+        "signals, methods" -> ("methods", "signals"). Ordenado e sem duplicatas,
+        serve como parte de chave de cache. None (ou seleção vazia) = todos os campos.
+        """
+        if fields is None:
+            return None
+        if isinstance(fields, str):
+            fields = fields.split(",")
+        sel = tuple(sorted({f.strip() for f in fields if f and f.strip()}))
+        return sel or None
+
+    @classmethod
+    def project(
+        cls,
+        src: Dict[str, Any],
+        keys: List[str],
+        fmts: Dict[str, Callable[[Any], Any]],
+        fields: Optional[str | Iterable[str]],
+        offset: int,
+        limit: Optional[int],
+        valid: Optional[Iterable[str]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Seleciona campos e pagina listas ANTES de formatar: só os itens da página
+        dos campos pedidos passam pelo formatador. Com paginação, "_counts" traz
+        o total de cada lista devolvida. Campos fora de valid (padrão: keys)
+        levantam UnknownFieldsError.
+        """
+        sel = cls.normalize_fields(fields)
+        if sel is not None:
+            allowed = set(keys if valid is None else valid)
+            unknown = [f for f in sel if f not in allowed]
+            if unknown:
+                raise UnknownFieldsError(unknown, allowed)
+        offset = max(0, int(offset or 0))
+        stop = None if limit is None else offset + max(0, int(limit))
+        paged = bool(offset) or limit is not None
+        out: Dict[str, Any] = {}
+        counts: Dict[str, int] = {}
+        for k in keys:
+            if sel is not None and k not in sel:
+                continue
+            v = src.get(k)
+            if isinstance(v, list):
+                page = v[offset:stop] if paged else v
+                fmt = fmts.get(k)
+                out[k] = [fmt(x) for x in page] if fmt else list(page)
+                counts[k] = len(v)
+            else:
+                out[k] = v
+        if paged:
+            out["_counts"] = counts
+        return out
 
     # ---------------------------------
     # Fallback determinístico "ultimo recurso"
@@ -481,6 +1196,17 @@ class ExtApi:
             "sections": sections,
         }
 
+    @staticmethod
+    def derive_blob_map(bm: Dict[str, Any], max_items_per_section: int) -> Dict[str, Any]:
+        """
+        Deriva o mapa para um limite menor a partir de um já calculado com limite
+        maior (ou 0 = sem limite): os itens de cada seção são um prefixo estável.
+        """
+        limit = max(0, int(max_items_per_section))
+        if not limit:
+            return bm
+        return dict(bm, sections=[dict(sec, items=sec["items"][:limit]) for sec in bm["sections"]])
+
     def get_blob_range(self, start: int, end: int) -> str:
         """
         Retorna a substring [start, end) do blob canônico.
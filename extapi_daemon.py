@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+extapi_daemon.py — Daemon local via Unix socket + cliente CLI para o ExtApi
+
+Mantém um único ExtApi residente e responde consultas por um socket Unix,
+sem TCP/HTTP e sem pagar o custo de parse/índices a cada invocação.
+
+Protocolo (framing por tamanho):
+    [u32 big-endian: tamanho do payload][payload JSON UTF-8]
+
+Requisição:  {"op": "get_class", "args": ["Node"], "kwargs": {}}
+Resposta:    {"ok": true, "result": ...}  ou  {"ok": false, "error": "..."}
+
+Uma conexão pode enviar várias requisições em sequência (keep-alive).
+
+Uso:
+    python extapi_daemon.py serve [--json extension_api.json] [--socket PATH]
+    python extapi_daemon.py call get_class Node
+    python extapi_daemon.py call find_methods get_name --kw cls=Node
+    python extapi_daemon.py call get_builtin_layout Vector2 --kw config=float_64
+    python extapi_daemon.py call get_blob_range 0 128 --json-args
+
+Argumentos posicionais são strings; valores de --kw (e posicionais com
+--json-args) são decodificados como JSON quando possível ("12" -> 12).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import stat
+import struct
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import extapi_core
+
+# --- Config ---------------------------------------------------------------
+
+EXTAPI_JSON = Path(os.getenv("EXTAPI_JSON", "extension_api.json")).resolve()
+
+
+def _default_socket_path() -> str:
+    env = os.getenv("EXTAPI_SOCKET")
+    if env:
+        return env
+    runtime = os.getenv("XDG_RUNTIME_DIR")
+    if runtime:
+        return str(Path(runtime) / "extapi.sock")
+    return f"/tmp/extapi-{os.getuid()}.sock"
+
+
+SOCKET_PATH = _default_socket_path()
+
+# Limite de frame, evita alocação absurda com cabeçalho corrompido
+MAX_FRAME = 64 * 1024 * 1024
+
+_HDR = struct.Struct(">I")
+
+# Métodos do ExtApi expostos pelo daemon (somente consultas)
+OPS = frozenset({
+    "info",
+    "get_class",
+    "list_class_items",
+    "get_property_accessors",
+    "export_property_accessors",
+    "find_methods",
+    "find_method_by_hash",
+    "get_global_enum",
+    "get_class_enum",
+    "decode_enum_values",
+    "encode_enum_values",
+    "list_singletons",
+    "find_utility",
+    "list_builtin_names",
+    "get_builtin",
+    "get_builtin_layout",
+    "get_builtin_member_offset",
+    "list_native_structs",
+    "get_native_struct",
+    "get_blob_map",
+    "get_blob_range",
+})
+
+# --- Framing --------------------------------------------------------------
+
+def _recv_exact(sock: socket.socket, n: int) -> Optional[bytes]:
+    buf = bytearray()
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            return None
+        buf += chunk
+    return bytes(buf)
+
+
+def recv_frame(sock: socket.socket) -> Optional[Any]:
+    """Lê um frame e devolve o JSON decodificado, ou None se a conexão fechou."""
+    hdr = _recv_exact(sock, _HDR.size)
+    if hdr is None:
+        return None
+    (n,) = _HDR.unpack(hdr)
+    if n > MAX_FRAME:
+        raise ValueError(f"frame grande demais: {n} bytes")
+    payload = _recv_exact(sock, n)
+    if payload is None:
+        return None
+    return json.loads(payload)
+
+
+def send_frame(sock: socket.socket, obj: Any) -> None:
+    payload = json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    # cabeçalho + payload num único sendall, evita dois syscalls/segmentos
+    sock.sendall(_HDR.pack(len(payload)) + payload)
+
+# --- Estado ---------------------------------------------------------------
+
+def _dispatch(state: extapi_core.ExtApiState, req: Any) -> Dict[str, Any]:
+    if not isinstance(req, dict):
+        return {"ok": False, "error": "requisição deve ser um objeto JSON"}
+    op = req.get("op")
+    if op == "ping":
+        return {"ok": True, "result": "pong"}
+    if op not in OPS:
+        return {"ok": False, "error": f"op desconhecida: {op!r}"}
+    args = req.get("args") or []
+    kwargs = req.get("kwargs") or {}
+    if not isinstance(args, list) or not isinstance(kwargs, dict):
+        return {"ok": False, "error": "args deve ser lista e kwargs objeto"}
+    try:
+        state.maybe_reload()
+        result = getattr(state.ext, op)(*args, **kwargs)
+    except TypeError as exc:
+        return {"ok": False, "error": f"argumentos inválidos para {op}: {exc}"}
+    except Exception as exc:  # noqa: BLE001 — o daemon não deve cair por uma consulta
+        return {"ok": False, "error": f"{type(exc).__name__}: {exc}"}
+    return {"ok": True, "result": result}
+
+# --- Servidor -------------------------------------------------------------
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        sock: socket.socket = self.request
+        state: extapi_core.ExtApiState = self.server.state  # type: ignore[attr-defined]
+        while True:
+            try:
+                req = recv_frame(sock)
+            except (ValueError, json.JSONDecodeError) as exc:
+                send_frame(sock, {"ok": False, "error": f"frame inválido: {exc}"})
+                return
+            except OSError:
+                return
+            if req is None:
+                return
+            try:
+                send_frame(sock, _dispatch(state, req))
+            except OSError:
+                return
+
+
+class SocketInUse(RuntimeError):
+    pass
+
+
+def _claim_socket_path(socket_path: str) -> None:
+    """
+    Remove só socket órfão (connect recusado). Se outro daemon responde no
+    caminho, ou o caminho não é um socket, não mexe no arquivo.
+    """
+    try:
+        st = os.stat(socket_path)
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(st.st_mode):
+        raise SocketInUse(f"{socket_path} existe e não é um socket")
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except ConnectionRefusedError:
+        os.unlink(socket_path)
+        return
+    except FileNotFoundError:
+        return
+    finally:
+        probe.close()
+    raise SocketInUse(f"daemon já em execução em {socket_path}")
+
+
+class ExtApiDaemon(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, json_path: Path):
+        # checa o socket antes do load, que é a parte cara
+        _claim_socket_path(socket_path)
+        self.state = extapi_core.ExtApiState(json_path)
+        self.socket_path = socket_path
+        super().__init__(socket_path, _Handler)
+        os.chmod(socket_path, 0o600)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.socket_path)
+        except FileNotFoundError:
+            pass
+
+
+def serve(socket_path: str = SOCKET_PATH, json_path: Path = EXTAPI_JSON) -> None:
+    with ExtApiDaemon(socket_path, json_path) as srv:
+        print(f"extapi_daemon: {srv.state.ext.ix.version} em {socket_path}", file=sys.stderr)
+        try:
+            srv.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+# --- Cliente --------------------------------------------------------------
+
+class ExtApiClient:
+    """Cliente síncrono; reutiliza a mesma conexão entre chamadas."""
+
+    def __init__(self, socket_path: str = SOCKET_PATH):
+        self.socket_path = socket_path
+        self._sock: Optional[socket.socket] = None
+
+    def _conn(self) -> socket.socket:
+        if self._sock is None:
+            s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            s.connect(self.socket_path)
+            self._sock = s
+        return self._sock
+
+    def call(self, op: str, *args: Any, **kwargs: Any) -> Any:
+        sock = self._conn()
+        send_frame(sock, {"op": op, "args": list(args), "kwargs": kwargs})
+        resp = recv_frame(sock)
+        if resp is None:
+            self.close()
+            raise ConnectionError("daemon fechou a conexão")
+        if not resp.get("ok"):
+            raise RuntimeError(resp.get("error") or "erro desconhecido")
+        return resp.get("result")
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def __enter__(self) -> "ExtApiClient":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _coerce(v: str) -> Any:
+    # "123" -> 123, "true" -> True, "Node" -> "Node"
+    try:
+        return json.loads(v)
+    except ValueError:
+        return v
+
+
+def _parse_kw(items: List[str]) -> Dict[str, Any]:
+    out: Dict[str, Any] = {}
+    for it in items:
+        k, sep, v = it.partition("=")
+        if not sep or not k:
+            raise SystemExit(f"--kw espera chave=valor, recebeu {it!r}")
+        out[k] = _coerce(v)
+    return out
+
+# --- Main -----------------------------------------------------------------
+
+def main(argv: Optional[List[str]] = None) -> int:
+    # --socket aceito antes ou depois do subcomando
+    sock_opt = argparse.ArgumentParser(add_help=False)
+    sock_opt.add_argument("--socket", default=argparse.SUPPRESS, help="caminho do socket Unix")
+
+    ap = argparse.ArgumentParser(prog="extapi_daemon")
+    ap.add_argument("--socket", default=SOCKET_PATH, help="caminho do socket Unix")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    sp = sub.add_parser("serve", help="inicia o daemon", parents=[sock_opt])
+    sp.add_argument("--json", default=str(EXTAPI_JSON), help="caminho do extension_api.json")
+
+    cp = sub.add_parser("call", help="executa uma consulta no daemon", parents=[sock_opt])
+    cp.add_argument("op", choices=sorted(OPS | {"ping"}))
+    cp.add_argument("args", nargs="*")
+    cp.add_argument("--kw", action="append", default=[], metavar="CHAVE=VALOR")
+    cp.add_argument("--json-args", action="store_true", help="decodifica os posicionais como JSON")
+
+    ns = ap.parse_args(argv)
+
+    if ns.cmd == "serve":
+        try:
+            serve(ns.socket, Path(ns.json).resolve())
+        except SocketInUse as exc:
+            print(f"erro: {exc}", file=sys.stderr)
+            return 1
+        return 0
+
+    args = [_coerce(a) for a in ns.args] if ns.json_args else list(ns.args)
+    try:
+        with ExtApiClient(ns.socket) as cli:
+            result = cli.call(ns.op, *args, **_parse_kw(ns.kw))
+    except (OSError, RuntimeError) as exc:
+        print(f"erro: {exc}", file=sys.stderr)
+        return 1
+    json.dump(result, sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write("\n")
+    return 0 if result is not None else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,11 +2,17 @@
 # -*- coding: utf-8 -*-
 from __future__ import annotations
 
+import asyncio
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi import Body, FastAPI, HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse, PlainTextResponse
 import extapi_core
@@ -26,12 +32,28 @@ VALID_CONFIGS = {
     if c.strip()
 }
 
+MAX_BULK_ITEMS = int(os.getenv("EXTAPI_MAX_BULK_ITEMS", "10000"))
+MAX_PAGE_LIMIT = int(os.getenv("EXTAPI_MAX_PAGE_LIMIT", "10000"))
+MEMO_SIZE = int(os.getenv("EXTAPI_MEMO_SIZE", "32"))                 # /blob/map e afins (caros)
+CLASS_MEMO_SIZE = int(os.getenv("EXTAPI_CLASS_MEMO_SIZE", "1024"))    # /class/{name}/items (baratos, muitos)
+
+# Prewarm: pré-calcula saídas derivadas antes de receber tráfego (ver /ready)
+PREWARM = os.getenv("EXTAPI_PREWARM", "1") == "1"
+PREWARM_BLOCKING = os.getenv("EXTAPI_PREWARM_BLOCKING", "0") == "1"   # segura o startup até terminar
+PREWARM_THREADS = int(os.getenv("EXTAPI_PREWARM_THREADS", "4"))
+PREWARM_BLOB_LIMITS = [
+    int(x) for x in os.getenv("EXTAPI_PREWARM_BLOB_LIMITS", "0,200").split(",") if x.strip()
+]
+# nomes separados por vírgula, "*" para todas; vazio = as N maiores (EXTAPI_PREWARM_TOP_CLASSES)
+PREWARM_CLASSES = os.getenv("EXTAPI_PREWARM_CLASSES", "").strip()
+PREWARM_TOP_CLASSES = int(os.getenv("EXTAPI_PREWARM_TOP_CLASSES", "64"))
+
 OPEN_DOCS = os.getenv("OPEN_DOCS", "0") == "1"
 DOCS_URL = "/docs" if OPEN_DOCS else None
 REDOC_URL = "/redoc" if OPEN_DOCS else None
 OPENAPI_URL = "/openapi.json" if OPEN_DOCS else None
 
-OPEN_PATHS = {"/health"}
+OPEN_PATHS = {"/health", "/ready"}
 # Se quiser docs públicos sem chave, inclua DOCS_PUBLIC=1
 DOCS_PUBLIC = os.getenv("DOCS_PUBLIC", "0") == "1"
 if OPEN_DOCS and DOCS_PUBLIC:
@@ -39,12 +61,21 @@ if OPEN_DOCS and DOCS_PUBLIC:
 
 # --- App ------------------------------------------------------------------
 
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    if PREWARM_BLOCKING:
+        await asyncio.to_thread(prewarm.run, *state.snapshot)
+    else:
+        prewarm.start(*state.snapshot)
+    yield
+
 app = FastAPI(
     title="extapi_http",
     version="1.1.0",
     docs_url=DOCS_URL,
     redoc_url=REDOC_URL,
     openapi_url=OPENAPI_URL,
+    lifespan=lifespan,
 )
 
 # wildcard "*" não deve combinar com credentials=True
@@ -62,36 +93,130 @@ app.add_middleware(
 
 # --- Estado ---------------------------------------------------------------
 
-class _ApiState:
+class _ApiState(extapi_core.ExtApiState):
     def __init__(self, p: Path):
-        self.p = p
-        self._mtime = 0.0
-        self._ext: Optional[extapi_core.ExtApi] = None
-        self._load()
-
-    def _load(self):
-        if not self.p.exists():
-            raise FileNotFoundError(f"extension_api.json não encontrado em {self.p}")
-        self._ext = extapi_core.ExtApi(self.p)
-        self._mtime = self.p.stat().st_mtime
-
-    def maybe_reload(self):
-        m = self.p.stat().st_mtime
-        if m > self._mtime:
-            self._load()
-
-    @property
-    def ext(self) -> extapi_core.ExtApi:
-        if self._ext is None:
-            self._load()
-        return self._ext  # type: ignore
-
-    @property
-    def mtime(self) -> float:
-        return self._mtime
+        # memos separados: tráfego de /class/*/items não expulsa os blob maps
+        self.memo = extapi_core.SingleFlightMemo(MEMO_SIZE)
+        self.items_memo = extapi_core.SingleFlightMemo(CLASS_MEMO_SIZE)
+        self.on_reload: List[Callable[[int, extapi_core.ExtApi], None]] = []
+        super().__init__(p)
+
+    def _after_load(self, gen: int, ext: extapi_core.ExtApi) -> None:
+        # época do memo = geração: resultados de gerações antigas não gravam
+        self.memo.clear(gen)
+        self.items_memo.clear(gen)
+
+    def _on_reloaded(self, gen: int, ext: extapi_core.ExtApi) -> None:
+        for cb in self.on_reload:
+            cb(gen, ext)
 
 state = _ApiState(EXTAPI_JSON)
 
+# --- Prewarm --------------------------------------------------------------
+
+class _Prewarm:
+    """
+    Executa em threads as tarefas de aquecimento de uma geração e guarda o
+    progresso para o /ready. Fica "ready" após o primeiro aquecimento completo;
+    recargas reaquecem em background sem tirar o worker do balanceador.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.ready = not PREWARM
+        self.generation = 0
+        self.total = 0
+        self.done = 0
+        self.failed: List[str] = []
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def _tasks(self, gen: int, ext: extapi_core.ExtApi) -> List[Tuple[str, Callable[[], Any]]]:
+        tasks: List[Tuple[str, Callable[[], Any]]] = []
+
+        def _blob_maps():
+            # o maior primeiro; os menores saem derivados dele
+            for n in sorted(PREWARM_BLOB_LIMITS, key=lambda x: (x != 0, -x)):
+                jsonable_encoder(_cached_blob_map(n, snap=(gen, ext)))
+
+        if PREWARM_BLOB_LIMITS:
+            tasks.append(("blob_map", _blob_maps))
+
+        classes = self._classes(ext)
+        # o LRU de classes precisa caber o conjunto aquecido, senão o prewarm se auto-expulsa
+        state.items_memo.ensure_capacity(len(classes))
+        for cname in classes:
+            tasks.append((f"class_items:{cname}", lambda cname=cname: _cached_class_items(cname, snap=(gen, ext))))
+
+        # encoder/validação do FastAPI em payloads típicos
+        def _encoder():
+            jsonable_encoder(ext.info())
+            for h in list(ext.ix.methods_by_hash)[:16]:
+                jsonable_encoder(ext.find_method_by_hash(h))
+
+        tasks.append(("encoder", _encoder))
+        return tasks
+
+    @staticmethod
+    def _classes(ext: extapi_core.ExtApi) -> List[str]:
+        names = list(ext.ix.classes_by_name)
+        if PREWARM_CLASSES == "*":
+            return names
+        if PREWARM_CLASSES:
+            return [n for n in (x.strip() for x in PREWARM_CLASSES.split(",")) if n in ext.ix.classes_by_name]
+
+        def _weight(n: str) -> int:
+            c = ext.ix.classes_by_name[n]
+            return sum(len(c.get(k, []) or []) for k in ("methods", "properties", "signals", "constants", "enums"))
+
+        return sorted(names, key=_weight, reverse=True)[:max(0, PREWARM_TOP_CLASSES)]
+
+    def run(self, gen: int, ext: extapi_core.ExtApi) -> None:
+        if not PREWARM:
+            return
+        tasks = self._tasks(gen, ext)
+        with self._lock:
+            self.generation = gen
+            self.total = len(tasks)
+            self.done = 0
+            self.failed = []
+            self.started_at = time.time()
+            self.finished_at = None
+        with ThreadPoolExecutor(max_workers=max(1, PREWARM_THREADS), thread_name_prefix="prewarm") as pool:
+            futs = {pool.submit(fn): name for name, fn in tasks}
+            for fut in as_completed(futs):
+                with self._lock:
+                    if self.generation != gen:
+                        continue  # geração nova já assumiu o progresso
+                    self.done += 1
+                    if fut.exception() is not None:
+                        self.failed.append(f"{futs[fut]}: {fut.exception()}")
+        with self._lock:
+            if self.generation == gen:
+                self.finished_at = time.time()
+                self.ready = True
+
+    def start(self, gen: int, ext: extapi_core.ExtApi) -> None:
+        threading.Thread(target=self.run, args=(gen, ext), name="prewarm", daemon=True).start()
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            elapsed = None
+            if self.started_at is not None:
+                elapsed = round((self.finished_at or time.time()) - self.started_at, 3)
+            return {
+                "ready": self.ready,
+                "enabled": PREWARM,
+                "generation": self.generation,
+                "total": self.total,
+                "done": self.done,
+                "failed": list(self.failed),
+                "elapsed_s": elapsed,
+            }
+
+prewarm = _Prewarm()
+state.on_reload.append(prewarm.start)
+
 # --- Auth middleware ------------------------------------------------------
 
 @app.middleware("http")
@@ -131,6 +256,79 @@ def _validate_config_or_400(config: Optional[str]) -> None:
         valid = ", ".join(sorted(VALID_CONFIGS))
         raise HTTPException(status_code=400, detail=f"config inválida, use uma destas, {valid}")
 
+def _validate_bulk_or_413(items: List[Any]) -> None:
+    if len(items) > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=413, detail=f"máximo de {MAX_BULK_ITEMS} itens por requisição")
+
+def _project_or_400(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Chama uma consulta com ?fields=; campo desconhecido vira 400 com os válidos."""
+    try:
+        return fn(*args, **kwargs)
+    except extapi_core.UnknownFieldsError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+def _cached_blob_map(
+    max_items_per_section: int,
+    snap: Optional[Tuple[int, extapi_core.ExtApi]] = None,
+) -> Dict[str, Any]:
+    """
+    /blob/map memoizado por (geração, limite), com single-flight para chamadas
+    concorrentes. Um limite menor é derivado de um mapa já calculado com limite
+    maior (ou 0 = sem limite) em vez de refazer a busca no blob.
+    """
+    gen, ext = snap or state.snapshot
+    n = max_items_per_section
+    key = (gen, "blob_map", n)
+    hit = state.memo.get(key)
+    if hit is not None:
+        return hit
+    # limites do prewarm ficam fixados; os demais seguem no LRU
+    pin = n in PREWARM_BLOB_LIMITS
+    if n > 0:
+        larger = state.memo.find(
+            lambda k: k[0] == gen and k[1] == "blob_map" and (k[2] == 0 or k[2] >= n)
+        )
+        if larger is not None:
+            bm = ext.derive_blob_map(larger[1], n)
+            state.memo.put(key, bm, pin=pin, epoch=gen)
+            return bm
+    return state.memo.get_or_compute(
+        key, lambda: ext.get_blob_map(max_items_per_section=n), pin=pin, epoch=gen
+    )
+
+def _cached_class_items(
+    name: str,
+    fields: Optional[str] = None,
+    offset: int = 0,
+    limit: Optional[int] = None,
+    snap: Optional[Tuple[int, extapi_core.ExtApi]] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    /class/{name}/items memoizado por (geração, classe) na forma completa.
+    Projeções/páginas saem do item completo em cache sem reformatar; sem
+    cache, só a seleção pedida é formatada (e não entra no memo).
+    """
+    gen, ext = snap or state.snapshot
+    c = ext.get_class(name)
+    if c is None:
+        return None
+    cname = c.get("name")
+    key = (gen, "class_items", cname)
+    whole = ext.normalize_fields(fields) is None and not offset and limit is None
+    full = state.items_memo.get(key)
+    if full is None:
+        if whole:
+            return state.items_memo.get_or_compute(key, lambda: ext.list_class_items(cname), epoch=gen)
+        return ext.list_class_items(cname, fields=fields, offset=offset, limit=limit)
+    if whole:
+        return full
+    return ext.project(full, list(full.keys()), {}, fields, offset, limit)
+
+# Parâmetros comuns de projeção/paginação
+_FIELDS_Q = Query(None, description="campos separados por vírgula, ex.: signals,methods")
+_OFFSET_Q = Query(0, ge=0, description="início da página em cada lista selecionada")
+_LIMIT_Q = Query(None, ge=0, le=MAX_PAGE_LIMIT, description="tamanho da página em cada lista selecionada")
+
 # --- Rotas ----------------------------------------------------------------
 
 @app.get("/health")
@@ -143,32 +341,55 @@ def health():
         "port": int(os.getenv("PORT", "3737")),
         "allowed_origins": ALLOWED_ORIGINS,
         "json_mtime": state.mtime,
+        "generation": state.generation,
+        "memo": state.memo.stats(),
+        "items_memo": state.items_memo.stats(),
+        "prewarm": prewarm.status(),
         "open_docs": OPEN_DOCS,
         "docs_public": DOCS_PUBLIC,
         "allow_credentials": allow_credentials,
     }
 
+@app.get("/ready")
+def ready():
+    st = prewarm.status()
+    st["status"] = "ready" if st["ready"] else "warming"
+    return JSONResponse(status_code=200 if st["ready"] else 503, content=st)
+
 @app.get("/info")
 def get_info():
     state.maybe_reload()
     return state.ext.info()
 
 @app.get("/class/{name}")
-def get_class(name: str):
+def get_class(name: str, fields: Optional[str] = _FIELDS_Q, offset: int = _OFFSET_Q, limit: Optional[int] = _LIMIT_Q):
     state.maybe_reload()
-    c = state.ext.get_class(name)
-    if not c:
+    c = _project_or_400(state.ext.get_class, name, fields=fields, offset=offset, limit=limit)
+    if c is None:
         raise HTTPException(status_code=404, detail="classe não encontrada")
     return c
 
 @app.get("/class/{name}/items")
-def get_class_items(name: str):
+def get_class_items(name: str, fields: Optional[str] = _FIELDS_Q, offset: int = _OFFSET_Q, limit: Optional[int] = _LIMIT_Q):
     state.maybe_reload()
-    c = state.ext.list_class_items(name)
-    if not c:
+    c = _project_or_400(_cached_class_items, name, fields=fields, offset=offset, limit=limit)
+    if c is None:
         raise HTTPException(status_code=404, detail="classe não encontrada")
     return c
 
+@app.get("/class/{name}/accessors")
+def get_class_accessors(name: str, property: Optional[str] = None):
+    state.maybe_reload()
+    a = state.ext.get_property_accessors(name, prop=property)
+    if not a:
+        raise HTTPException(status_code=404, detail="classe ou propriedade não encontrada")
+    return a
+
+@app.get("/accessors")
+def all_accessors():
+    state.maybe_reload()
+    return state.ext.export_property_accessors()
+
 @app.get("/methods/by-name")
 def methods_by_name(name: str, cls: Optional[str] = None):
     state.maybe_reload()
@@ -195,6 +416,20 @@ def enum_class(qualified: str):
         raise HTTPException(status_code=404, detail="enum de classe não encontrado")
     return e
 
+@app.post("/enum/decode")
+def enum_decode(items: List[Dict[str, Any]] = Body(..., embed=True)):
+    """Lote de {"enum", "value"} -> nomes (bitfields são decompostos em flags)."""
+    _validate_bulk_or_413(items)
+    state.maybe_reload()
+    return state.ext.decode_enum_values(items)
+
+@app.post("/enum/encode")
+def enum_encode(items: List[Dict[str, Any]] = Body(..., embed=True)):
+    """Lote de {"enum", "names"} -> valores (nomes combinados por OR em bitfields)."""
+    _validate_bulk_or_413(items)
+    state.maybe_reload()
+    return state.ext.encode_enum_values(items)
+
 @app.get("/singletons")
 def singletons():
     state.maybe_reload()
@@ -211,10 +446,10 @@ def builtin_names():
     return state.ext.list_builtin_names()
 
 @app.get("/builtin/{name}")
-def builtin_detail(name: str):
+def builtin_detail(name: str, fields: Optional[str] = _FIELDS_Q, offset: int = _OFFSET_Q, limit: Optional[int] = _LIMIT_Q):
     state.maybe_reload()
-    b = state.ext.get_builtin(name)
-    if not b:
+    b = _project_or_400(state.ext.get_builtin, name, fields=fields, offset=offset, limit=limit)
+    if b is None:
         raise HTTPException(status_code=404, detail="builtin não encontrado")
     return b
 
@@ -242,10 +477,10 @@ def native_structs():
     return state.ext.list_native_structs()
 
 @app.get("/native_structs/{name}")
-def native_struct_detail(name: str):
+def native_struct_detail(name: str, fields: Optional[str] = _FIELDS_Q, offset: int = _OFFSET_Q, limit: Optional[int] = _LIMIT_Q):
     state.maybe_reload()
-    ns = state.ext.get_native_struct(name)
-    if not ns:
+    ns = _project_or_400(state.ext.get_native_struct, name, fields=fields, offset=offset, limit=limit)
+    if ns is None:
         raise HTTPException(status_code=404, detail="native struct não encontrada")
     return ns
 
@@ -254,7 +489,7 @@ def native_struct_detail(name: str):
 @app.get("/blob/map")
 def blob_map(max_items_per_section: int = Query(200, ge=0, le=10000)):
     state.maybe_reload()
-    return state.ext.get_blob_map(max_items_per_section=max_items_per_section)
+    return _cached_blob_map(max_items_per_section)
 
 @app.get("/blob/range", response_class=PlainTextResponse)
 def blob_range(start: int = Query(..., ge=0), end: int = Query(..., ge=0)):
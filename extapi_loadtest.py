@@ -0,0 +1,525 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+extapi_loadtest.py — Replay de carga HTTP com percentis de latência
+
+Dirige o app com um mix de requisições (sintético ou gravado) numa
+concorrência fixa e reporta throughput e p50/p95/p99/max por rota.
+
+Modos:
+- in-process (padrão): chama extapi_http.app direto via ASGI, sem rede.
+- --url http://127.0.0.1:3737: contra um uvicorn local, uma conexão
+  keep-alive por worker.
+
+Recarga: --reload-at S substitui o extension_api.json (os.replace + mtime
+novo) S segundos após o início; as amostras são separadas em antes/depois
+para medir o impacto da recarga. No modo in-process o app serve uma cópia
+temporária do JSON, o arquivo original nunca é tocado.
+
+O relógio só começa com o prewarm concluído (/ready = 200, ou prewarm.ready
+no modo in-process), até --ready-timeout segundos.
+
+Exemplos:
+    python extapi_loadtest.py --json extension_api.json -c 16 -d 20
+    python extapi_loadtest.py --json extension_api.json --record mix.jsonl -d 0
+    python extapi_loadtest.py --url http://127.0.0.1:3737 --json extension_api.json \\
+        --replay mix.jsonl --reload-at 5 --reload-file /app/extension_api.json --out run.json
+
+Formato do mix (JSONL): {"route": "/class/{name}", "method": "GET", "path": "/class/Node?fields=signals"}
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import http.client
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+import extapi_core
+
+# --- Mix de requisições ---------------------------------------------------
+
+DEFAULT_MIX = "class=25,class_items=15,hash=25,enum=5,blob_range=20,blob_map=5,builtin_layout=5"
+
+Req = Dict[str, Any]  # {"route", "method", "path", "body"?}
+
+
+def _parse_mix(spec: str) -> Dict[str, int]:
+    out: Dict[str, int] = {}
+    for part in spec.split(","):
+        k, sep, v = part.partition("=")
+        if not sep or not k.strip():
+            raise SystemExit(f"--mix espera rota=peso, recebeu {part!r}")
+        out[k.strip()] = int(v)
+    unknown = set(out) - set(_GENERATORS)
+    if unknown:
+        raise SystemExit(f"rotas desconhecidas no mix: {', '.join(sorted(unknown))}")
+    return out
+
+
+def _gen_class(ext: extapi_core.ExtApi, rnd: random.Random) -> Req:
+    n = rnd.choice(list(ext.ix.classes_by_name))
+    return {"route": "/class/{name}", "method": "GET", "path": f"/class/{n}"}
+
+
+def _gen_class_items(ext: extapi_core.ExtApi, rnd: random.Random) -> Req:
+    n = rnd.choice(list(ext.ix.classes_by_name))
+    return {"route": "/class/{name}/items", "method": "GET", "path": f"/class/{n}/items"}
+
+
+def _gen_hash(ext: extapi_core.ExtApi, rnd: random.Random) -> Req:
+    h = rnd.choice(list(ext.ix.methods_by_hash))
+    return {"route": "/methods/by-hash", "method": "GET", "path": f"/methods/by-hash?hash={h}"}
+
+
+def _gen_enum(ext: extapi_core.ExtApi, rnd: random.Random) -> Req:
+    n = rnd.choice(list(ext.ix.global_enums_by_name))
+    return {"route": "/enum/global/{name}", "method": "GET", "path": f"/enum/global/{n}"}
+
+
+def _gen_blob_range(ext: extapi_core.ExtApi, rnd: random.Random) -> Req:
+    size = len(ext.canon)
+    start = rnd.randrange(0, max(1, size - 1))
+    end = min(size, start + rnd.choice((256, 4096, 65536)))
+    return {"route": "/blob/range", "method": "GET", "path": f"/blob/range?start={start}&end={max(end, start + 1)}"}
+
+
+def _gen_blob_map(ext: extapi_core.ExtApi, rnd: random.Random) -> Req:
+    n = rnd.choice((0, 50, 200))
+    return {"route": "/blob/map", "method": "GET", "path": f"/blob/map?max_items_per_section={n}"}
+
+
+def _gen_builtin_layout(ext: extapi_core.ExtApi, rnd: random.Random) -> Req:
+    n = rnd.choice(list(ext.ix.builtin_classes_by_name))
+    return {"route": "/builtin/{name}/layout", "method": "GET", "path": f"/builtin/{n}/layout"}
+
+
+_GENERATORS: Dict[str, Callable[[extapi_core.ExtApi, random.Random], Req]] = {
+    "class": _gen_class,
+    "class_items": _gen_class_items,
+    "hash": _gen_hash,
+    "enum": _gen_enum,
+    "blob_range": _gen_blob_range,
+    "blob_map": _gen_blob_map,
+    "builtin_layout": _gen_builtin_layout,
+}
+
+
+def synth_mix(json_path: Path, mix: Dict[str, int], n: int, seed: int) -> List[Req]:
+    ext = extapi_core.ExtApi(json_path)
+    rnd = random.Random(seed)
+    kinds = [k for k, w in mix.items() if w > 0]
+    weights = [mix[k] for k in kinds]
+    out: List[Req] = []
+    for kind in rnd.choices(kinds, weights=weights, k=n):
+        try:
+            out.append(_GENERATORS[kind](ext, rnd))
+        except IndexError:
+            # seção vazia no JSON (ex.: sem enums globais)
+            continue
+    return out
+
+
+def load_replay(path: Path) -> List[Req]:
+    out: List[Req] = []
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            r = json.loads(line)
+            r.setdefault("method", "GET")
+            r.setdefault("route", r["path"].split("?", 1)[0])
+            out.append(r)
+    return out
+
+# --- Estatística ----------------------------------------------------------
+
+def _pct(sorted_vals: List[float], p: float) -> float:
+    # nearest-rank
+    if not sorted_vals:
+        return 0.0
+    k = max(0, min(len(sorted_vals) - 1, math.ceil(p / 100.0 * len(sorted_vals)) - 1))
+    return sorted_vals[k]
+
+
+def _summary(lat_s: List[float], errors: int, wall: float) -> Dict[str, Any]:
+    v = sorted(lat_s)
+    ms = 1000.0
+    return {
+        "count": len(v),
+        "errors": errors,
+        "rps": round(len(v) / wall, 2) if wall > 0 else 0.0,
+        "mean_ms": round(sum(v) / len(v) * ms, 3) if v else 0.0,
+        "p50_ms": round(_pct(v, 50) * ms, 3),
+        "p95_ms": round(_pct(v, 95) * ms, 3),
+        "p99_ms": round(_pct(v, 99) * ms, 3),
+        "max_ms": round((v[-1] if v else 0.0) * ms, 3),
+    }
+
+
+class _Recorder:
+    """Amostras (rota, t_inicio, latência, ok); thread-safe para o modo --url."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples: List[Tuple[str, float, float, bool]] = []
+
+    def add(self, route: str, t0: float, lat: float, ok: bool) -> None:
+        with self._lock:
+            self.samples.append((route, t0, lat, ok))
+
+    def report(self, t_start: float, t_end: float, reload_t: Optional[float]) -> Dict[str, Any]:
+        wall = t_end - t_start
+
+        def _group(samples) -> Tuple[List[float], int, Dict[str, Tuple[List[float], int]]]:
+            by_route: Dict[str, Tuple[List[float], int]] = {}
+            all_lat: List[float] = []
+            all_err = 0
+            for route, _, lat, ok in samples:
+                lats, err = by_route.get(route, ([], 0))
+                lats.append(lat)
+                by_route[route] = (lats, err + (0 if ok else 1))
+                all_lat.append(lat)
+                all_err += 0 if ok else 1
+            return all_lat, all_err, by_route
+
+        all_lat, all_err, by_route = _group(self.samples)
+        out: Dict[str, Any] = {
+            "wall_s": round(wall, 3),
+            "total": _summary(all_lat, all_err, wall),
+            "routes": {r: _summary(l, e, wall) for r, (l, e) in sorted(by_route.items())},
+        }
+        if reload_t is not None:
+            before = [s for s in self.samples if s[1] < reload_t]
+            after = [s for s in self.samples if s[1] >= reload_t]
+            b_lat, b_err, _ = _group(before)
+            a_lat, a_err, _ = _group(after)
+            out["reload"] = {
+                "at_s": round(reload_t - t_start, 3),
+                "before": _summary(b_lat, b_err, reload_t - t_start),
+                "after": _summary(a_lat, a_err, t_end - reload_t),
+            }
+        return out
+
+# --- Recarga --------------------------------------------------------------
+
+def replace_file(path: Path) -> None:
+    """Regrava o arquivo de forma atômica e garante mtime maior que o anterior."""
+    old = path.stat().st_mtime
+    fd, tmp = tempfile.mkstemp(dir=str(path.parent), prefix=".extapi_reload_")
+    os.close(fd)
+    shutil.copyfile(path, tmp)
+    os.replace(tmp, path)
+    now = max(time.time(), old + 1.0)
+    os.utime(path, (now, now))
+
+# --- Modo ASGI (in-process) -----------------------------------------------
+
+async def _asgi_lifespan(phase: str, queue_in: "asyncio.Queue", queue_out: "asyncio.Queue") -> None:
+    await queue_in.put({"type": f"lifespan.{phase}"})
+    msg = await queue_out.get()
+    if msg["type"].endswith(".failed"):
+        raise RuntimeError(f"lifespan {phase} falhou: {msg.get('message')}")
+
+
+async def _asgi_call(app, req: Req, headers: List[Tuple[bytes, bytes]]) -> int:
+    path, _, query = req["path"].partition("?")
+    body = req.get("body")
+    raw_body = json.dumps(body).encode("utf-8") if body is not None else b""
+    hdrs = list(headers)
+    if body is not None:
+        hdrs.append((b"content-type", b"application/json"))
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": req.get("method", "GET"),
+        "scheme": "http",
+        "path": unquote(path),
+        "raw_path": path.encode("latin-1"),
+        "root_path": "",
+        "query_string": query.encode("latin-1"),
+        "headers": hdrs,
+        "client": ("127.0.0.1", 0),
+        "server": ("loadtest", 80),
+    }
+    done = asyncio.Event()
+    sent = False
+    status = 0
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": raw_body, "more_body": False}
+        # middlewares esperam disconnect; só entrega depois da resposta
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(msg):
+        nonlocal status
+        if msg["type"] == "http.response.start":
+            status = msg["status"]
+        elif msg["type"] == "http.response.body" and not msg.get("more_body"):
+            done.set()
+
+    await app(scope, receive, send)
+    done.set()
+    return status
+
+
+async def _await_prewarm(mod: Any, timeout: float) -> None:
+    # threads de prewarm disputariam CPU/GIL com as primeiras medições
+    t_end = time.perf_counter() + timeout
+    while not getattr(getattr(mod, "prewarm", None), "ready", True):
+        if time.perf_counter() >= t_end:
+            raise SystemExit(f"prewarm não concluiu em {timeout}s")
+        await asyncio.sleep(0.05)
+
+
+async def _run_asgi(reqs: List[Req], concurrency: int, duration: float, max_requests: int,
+                    headers: List[Tuple[bytes, bytes]], reload_at: Optional[float],
+                    reload_file: Optional[Path], rec: _Recorder,
+                    ready_timeout: float = 120.0) -> Tuple[float, float, Optional[float]]:
+    import extapi_http  # EXTAPI_JSON já configurado pelo main
+
+    app = extapi_http.app
+    ls_in: asyncio.Queue = asyncio.Queue()
+    ls_out: asyncio.Queue = asyncio.Queue()
+    lifespan = asyncio.create_task(app({"type": "lifespan", "asgi": {"version": "3.0"}}, ls_in.get, ls_out.put))
+    await _asgi_lifespan("startup", ls_in, ls_out)
+    await _await_prewarm(extapi_http, ready_timeout)
+
+    counter = iter(range(max_requests if max_requests > 0 else sys.maxsize))
+    t_start = time.perf_counter()
+    deadline = t_start + duration if duration > 0 else float("inf")
+    reload_t: Optional[float] = None
+
+    async def worker(wid: int) -> None:
+        i = wid
+        while time.perf_counter() < deadline:
+            if next(counter, None) is None:
+                return
+            req = reqs[i % len(reqs)]
+            i += concurrency
+            t0 = time.perf_counter()
+            try:
+                st = await _asgi_call(app, req, headers)
+                ok = 200 <= st < 400
+            except Exception:  # noqa: BLE001 — conta como erro e segue
+                ok = False
+            rec.add(req["route"], t0, time.perf_counter() - t0, ok)
+
+    async def reloader() -> None:
+        nonlocal reload_t
+        await asyncio.sleep(reload_at)  # type: ignore[arg-type]
+        reload_t = time.perf_counter()
+        await asyncio.to_thread(replace_file, reload_file)  # type: ignore[arg-type]
+
+    tasks = [asyncio.create_task(worker(w)) for w in range(concurrency)]
+    rtask = asyncio.create_task(reloader()) if reload_at is not None and reload_file else None
+    await asyncio.gather(*tasks)
+    t_end = time.perf_counter()
+    if rtask and not rtask.done():
+        rtask.cancel()
+
+    await _asgi_lifespan("shutdown", ls_in, ls_out)
+    await lifespan
+    return t_start, t_end, reload_t
+
+# --- Modo HTTP (uvicorn local) --------------------------------------------
+
+def _wait_ready(host: str, port: int, headers: Dict[str, str], timeout: float) -> None:
+    """Espera /ready = 200; 404 (servidor sem /ready) conta como pronto."""
+    t_end = time.perf_counter() + timeout
+    last = "sem resposta"
+    while True:
+        conn = http.client.HTTPConnection(host, port, timeout=5)
+        try:
+            conn.request("GET", "/ready", headers=headers)
+            resp = conn.getresponse()
+            resp.read()
+            if resp.status in (200, 404):
+                return
+            last = f"HTTP {resp.status}"
+        except (OSError, http.client.HTTPException) as exc:
+            last = str(exc)
+        finally:
+            conn.close()
+        if time.perf_counter() >= t_end:
+            raise SystemExit(f"/ready não respondeu 200 em {timeout}s ({last})")
+        time.sleep(0.25)
+
+
+def _run_http(base_url: str, reqs: List[Req], concurrency: int, duration: float, max_requests: int,
+              headers: Dict[str, str], reload_at: Optional[float], reload_file: Optional[Path],
+              rec: _Recorder, ready_timeout: float = 120.0) -> Tuple[float, float, Optional[float]]:
+    u = urlsplit(base_url)
+    host, port = u.hostname or "127.0.0.1", u.port or 80
+    _wait_ready(host, port, headers, ready_timeout)
+    lock = threading.Lock()
+    issued = [0]
+    reload_t: List[Optional[float]] = [None]
+
+    def _take() -> bool:
+        with lock:
+            if max_requests > 0 and issued[0] >= max_requests:
+                return False
+            issued[0] += 1
+            return True
+
+    def worker(wid: int) -> None:
+        conn = http.client.HTTPConnection(host, port, timeout=60)
+        i = wid
+        while time.perf_counter() < deadline and _take():
+            req = reqs[i % len(reqs)]
+            i += concurrency
+            body = req.get("body")
+            data = json.dumps(body).encode("utf-8") if body is not None else None
+            h = dict(headers)
+            if data is not None:
+                h["content-type"] = "application/json"
+            t0 = time.perf_counter()
+            try:
+                conn.request(req.get("method", "GET"), req["path"], body=data, headers=h)
+                resp = conn.getresponse()
+                resp.read()
+                ok = 200 <= resp.status < 400
+            except (OSError, http.client.HTTPException):
+                ok = False
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=60)
+            rec.add(req["route"], t0, time.perf_counter() - t0, ok)
+        conn.close()
+
+    def reloader() -> None:
+        time.sleep(reload_at)  # type: ignore[arg-type]
+        if time.perf_counter() < deadline:
+            reload_t[0] = time.perf_counter()
+            replace_file(reload_file)  # type: ignore[arg-type]
+
+    t_start = time.perf_counter()
+    deadline = t_start + duration if duration > 0 else float("inf")
+    if reload_at is not None and reload_file:
+        threading.Thread(target=reloader, daemon=True).start()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    return t_start, time.perf_counter(), reload_t[0]
+
+# --- Main -----------------------------------------------------------------
+
+def _print_report(rep: Dict[str, Any]) -> None:
+    cols = ("count", "errors", "rps", "p50_ms", "p95_ms", "p99_ms", "max_ms")
+    print(f"{'route':<28}" + "".join(f"{c:>10}" for c in cols))
+    for name, st in list(rep["routes"].items()) + [("TOTAL", rep["total"])]:
+        print(f"{name:<28}" + "".join(f"{st[c]:>10}" for c in cols))
+    if "reload" in rep:
+        r = rep["reload"]
+        print(f"\nreload em {r['at_s']}s")
+        for ph in ("before", "after"):
+            print(f"{ph:<28}" + "".join(f"{r[ph][c]:>10}" for c in cols))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="extapi_loadtest")
+    ap.add_argument("--json", default=os.getenv("EXTAPI_JSON", "extension_api.json"),
+                    help="extension_api.json usado para o mix sintético e no modo in-process")
+    ap.add_argument("--url", default=None, help="base de um uvicorn local; sem isso roda in-process via ASGI")
+    ap.add_argument("-c", "--concurrency", type=int, default=8)
+    ap.add_argument("-d", "--duration", type=float, default=10.0, help="segundos; 0 = sem limite de tempo")
+    ap.add_argument("-n", "--requests", type=int, default=0, help="total de requisições; 0 = sem limite")
+    ap.add_argument("--mix", default=DEFAULT_MIX, help=f"pesos por rota (padrão: {DEFAULT_MIX})")
+    ap.add_argument("--pool", type=int, default=5000, help="tamanho do mix sintético (reutilizado em ciclo)")
+    ap.add_argument("--seed", type=int, default=1234)
+    ap.add_argument("--replay", default=None, help="JSONL gravado com as requisições")
+    ap.add_argument("--record", default=None, help="grava o mix usado em JSONL")
+    ap.add_argument("--reload-at", type=float, default=None, help="segundos até substituir o JSON")
+    ap.add_argument("--reload-file", default=None, help="arquivo a substituir no modo --url")
+    ap.add_argument("--api-key", default=os.getenv("EXTAPI_KEY", ""))
+    ap.add_argument("--ready-timeout", type=float, default=120.0,
+                    help="segundos de espera pelo prewarm (/ready) antes de medir")
+    ap.add_argument("--out", default=None, help="salva o resultado em JSON")
+    ns = ap.parse_args(argv)
+
+    json_path = Path(ns.json).resolve()
+    if ns.replay:
+        reqs = load_replay(Path(ns.replay))
+    else:
+        reqs = synth_mix(json_path, _parse_mix(ns.mix), ns.pool, ns.seed)
+    if ns.record:
+        with open(ns.record, "w", encoding="utf-8") as f:
+            for r in reqs:
+                f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    if not reqs:
+        print("mix vazio", file=sys.stderr)
+        return 1
+    if ns.duration <= 0 and ns.requests <= 0:
+        # só gravação do mix
+        return 0
+
+    rec = _Recorder()
+    tmpdir: Optional[str] = None
+    try:
+        if ns.url:
+            reload_file = Path(ns.reload_file).resolve() if ns.reload_file else None
+            if ns.reload_at is not None and not reload_file:
+                raise SystemExit("--reload-at no modo --url exige --reload-file")
+            headers = {"x-api-key": ns.api_key} if ns.api_key else {}
+            t_start, t_end, reload_t = _run_http(ns.url, reqs, ns.concurrency, ns.duration, ns.requests,
+                                                 headers, ns.reload_at, reload_file, rec, ns.ready_timeout)
+        else:
+            serve_path = json_path
+            if ns.reload_at is not None:
+                tmpdir = tempfile.mkdtemp(prefix="extapi_loadtest_")
+                serve_path = Path(tmpdir) / json_path.name
+                shutil.copyfile(json_path, serve_path)
+            os.environ["EXTAPI_JSON"] = str(serve_path)
+            if ns.api_key:
+                os.environ["EXTAPI_KEY"] = ns.api_key
+            headers_b = [(b"host", b"loadtest")]
+            if ns.api_key:
+                headers_b.append((b"x-api-key", ns.api_key.encode("latin-1")))
+            t_start, t_end, reload_t = asyncio.run(
+                _run_asgi(reqs, ns.concurrency, ns.duration, ns.requests, headers_b,
+                          ns.reload_at, serve_path if ns.reload_at is not None else None, rec,
+                          ns.ready_timeout)
+            )
+    finally:
+        if tmpdir:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+    rep = rec.report(t_start, t_end, reload_t)
+    rep["config"] = {
+        "mode": "http" if ns.url else "asgi",
+        "url": ns.url,
+        "json": str(json_path),
+        "concurrency": ns.concurrency,
+        "duration_s": ns.duration,
+        "requests": ns.requests,
+        "mix": ns.replay or ns.mix,
+        "seed": ns.seed,
+        "reload_at_s": ns.reload_at,
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+    _print_report(rep)
+    if ns.out:
+        with open(ns.out, "w", encoding="utf-8") as f:
+            json.dump(rep, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
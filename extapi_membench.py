@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+extapi_membench.py — Memória de pico e em regime do carregamento do ExtApi
+
+Compara o caminho legado (texto -> json.loads -> json.dumps) com a leitura em
+streaming. Cada modo roda num processo novo para que o RSS de um não
+contamine o outro.
+
+Métricas por modo:
+- load_s: tempo de construção do ExtApi
+- py_peak_mb / py_steady_mb: pico e residual de alocações Python (tracemalloc)
+- rss_peak_mb / rss_steady_mb: RSS máximo do processo e RSS após o load
+
+Uso:
+    python extapi_membench.py --json extension_api.json [--out mem.json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+MODES = ("legacy", "stream")
+MB = 1024.0 * 1024.0
+
+
+def _rss_now_mb() -> float:
+    # /proc é Linux; fora dele devolve 0 e fica só o pico via getrusage
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / MB
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+def _rss_peak_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss: KiB no Linux, bytes no macOS
+    return peak / MB if sys.platform == "darwin" else peak / 1024.0
+
+
+def _measure(mode: str, json_path: Path) -> Dict[str, Any]:
+    import extapi_core
+
+    gc.collect()
+    rss_base = _rss_now_mb()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    ext = extapi_core.ExtApi(json_path, stream=(mode == "stream"))
+    load_s = time.perf_counter() - t0
+    gc.collect()
+    steady, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "mode": mode,
+        "load_s": round(load_s, 3),
+        "py_peak_mb": round(peak / MB, 1),
+        "py_steady_mb": round(steady / MB, 1),
+        "rss_base_mb": round(rss_base, 1),
+        "rss_peak_mb": round(_rss_peak_mb(), 1),
+        "rss_steady_mb": round(_rss_now_mb(), 1),
+        "canonical_bytes": len(ext.canon),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(prog="extapi_membench")
+    ap.add_argument("--json", default=os.getenv("EXTAPI_JSON", "extension_api.json"))
+    ap.add_argument("--modes", default=",".join(MODES), help="legacy,stream")
+    ap.add_argument("--out", default=None, help="salva o resultado em JSON")
+    ap.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    ns = ap.parse_args(argv)
+
+    json_path = Path(ns.json).resolve()
+    if ns.child:
+        json.dump(_measure(ns.child, json_path), sys.stdout)
+        return 0
+
+    results: List[Dict[str, Any]] = []
+    for mode in [m.strip() for m in ns.modes.split(",") if m.strip()]:
+        if mode not in MODES:
+            raise SystemExit(f"modo desconhecido: {mode}")
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--json", str(json_path), "--child", mode],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+        results.append(json.loads(proc.stdout))
+
+    cols = ("load_s", "py_peak_mb", "py_steady_mb", "rss_peak_mb", "rss_steady_mb")
+    print(f"{'mode':<10}" + "".join(f"{c:>15}" for c in cols))
+    for r in results:
+        print(f"{r['mode']:<10}" + "".join(f"{r[c]:>15}" for c in cols))
+
+    out = {
+        "json": str(json_path),
+        "file_bytes": json_path.stat().st_size,
+        "results": results,
+    }
+    if ns.out:
+        with open(ns.out, "w", encoding="utf-8") as f:
+            json.dump(out, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())